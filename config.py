@@ -5,7 +5,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Debug prints - only show if DEBUG environment variable is set
-if os.getenv('DEBUG', 'false').lower() == 'true':
+DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
+if DEBUG:
     print("DEBUG: Loading environment variables...")
     print(f"DEBUG: USERNAME from env: {os.getenv('BUYING_GROUP_USERNAME')}")
     print(f"DEBUG: PASSWORD from env: {'*' * len(os.getenv('BUYING_GROUP_PASSWORD', '')) if os.getenv('BUYING_GROUP_PASSWORD') else '(empty)'}")
@@ -26,6 +27,10 @@ DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL')
 CHECK_INTERVAL_MINUTES = int(os.getenv('CHECK_INTERVAL_MINUTES', '5'))  # Check every 5 minutes by default
 DATABASE_PATH = os.getenv('DATABASE_PATH', 's3://buying-group-deals/deals.json')  # Use S3 for database
 
+# Optional file used to persist login cookies between runs (disabled when empty)
+SESSION_CACHE_PATH = os.getenv('SESSION_CACHE_PATH', '')
+SESSION_CACHE_MAX_AGE_HOURS = int(os.getenv('SESSION_CACHE_MAX_AGE_HOURS', '24'))
+
 # Logging Configuration
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
 
@@ -33,16 +38,24 @@ LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))  # 30 seconds timeout
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))  # Maximum retry attempts
 RETRY_DELAY = int(os.getenv('RETRY_DELAY', '5'))  # Delay between retries in seconds
+POOL_CONNECTIONS = int(os.getenv('POOL_CONNECTIONS', '4'))  # Number of per-host connection pools to keep
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', '16'))  # Keep-alive connections kept open per host
 
 # User Agent to mimic browser
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
 
+# Only advertise the encodings urllib3 can decode here (br/zstd need optional packages)
+try:
+    from urllib3.util.request import ACCEPT_ENCODING
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
 # Headers for requests
 DEFAULT_HEADERS = {
     'User-Agent': USER_AGENT,
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
     'Accept-Language': 'en-CA,en-GB;q=0.9,en-US;q=0.8,en-IN;q=0.7,en;q=0.6',
-    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept-Encoding': ACCEPT_ENCODING,
     'DNT': '1',
     'Connection': 'keep-alive',
     'Upgrade-Insecure-Requests': '1',
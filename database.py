@@ -1,8 +1,8 @@
 import boto3
-import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from config import S3_BUCKET, S3_KEY
 from botocore.exceptions import ClientError
+from utils import dumps_json, loads_json
 import os
 from datetime import datetime
 
@@ -11,16 +11,30 @@ class DealDatabase:
         self.bucket = bucket
         self.key = key
         self.s3 = boto3.client('s3')
+        # (ETag, deals) of the last object read from or written to S3. It is swapped as one
+        # tuple so a /status load racing a monitor save never pairs deals with the wrong ETag.
+        self._cache: Optional[Tuple[str, List[Dict]]] = None
 
     def _load_deals(self) -> List[Dict]:
+        cache = self._cache
+        request = {'Bucket': self.bucket, 'Key': self.key}
+        if cache:
+            request['IfNoneMatch'] = cache[0]
         try:
-            response = self.s3.get_object(Bucket=self.bucket, Key=self.key)
-            deals = json.loads(response['Body'].read().decode('utf-8'))
-            return deals
+            response = self.s3.get_object(**request)
+            deals = loads_json(response['Body'].read())
+            etag = response.get('ETag')
+            self._cache = (etag, deals) if etag else None
+            return list(deals)
         except self.s3.exceptions.NoSuchKey:
+            self._cache = None
             return []
         except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
+            code = e.response['Error']['Code']
+            if code in ('304', 'NotModified') and cache:
+                return list(cache[1])
+            if code == 'NoSuchKey':
+                self._cache = None
                 return []
             print(f"Error loading deals from S3: {e}")
             return []
@@ -30,7 +44,9 @@ class DealDatabase:
 
     def _save_deals(self, deals: List[Dict]):
         try:
-            self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(deals))
+            response = self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=dumps_json(deals))
+            etag = response.get('ETag')
+            self._cache = (etag, list(deals)) if etag else None
         except Exception as e:
             print(f"Error saving deals to S3: {e}")
 
@@ -38,16 +54,28 @@ class DealDatabase:
         return self._load_deals()
 
     def add_deal(self, deal: Dict) -> bool:
+        return self.add_deals([deal])
+
+    def add_deals(self, new_deals: List[Dict]) -> bool:
+        """Add or replace several deals with a single S3 read and write."""
+        if not new_deals:
+            return True
         deals = self._load_deals()
-        for i, d in enumerate(deals):
-            if d['deal_id'] == deal['deal_id']:
+        positions = {d['deal_id']: i for i, d in enumerate(deals)}
+        for deal in new_deals:
+            i = positions.get(deal['deal_id'])
+            if i is None:
+                positions[deal['deal_id']] = len(deals)
+                deals.append(deal)
+            else:
                 deals[i] = deal
-                self._save_deals(deals)
-                return True
-        deals.append(deal)
         self._save_deals(deals)
         return True
 
+    def get_deal_ids(self) -> Set[str]:
+        """Load the stored deal IDs once, for membership checks over a whole batch."""
+        return {d['deal_id'] for d in self._load_deals()}
+
     def deal_exists(self, deal_id: str) -> bool:
         deals = self._load_deals()
         return any(d['deal_id'] == deal_id for d in deals)
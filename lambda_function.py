@@ -6,6 +6,25 @@ from database import DealDatabase
 from scraper import BuyingGroupScraper
 from notifier import DiscordNotifier
 
+# Components are kept at module level so warm invocations reuse the scraper's
+# logged-in session and keep-alive connections, and the S3 client
+_db = None
+_scraper = None
+_notifier = None
+
+def get_components(bucket_name, discord_webhook):
+    """
+    Create the database, scraper and notifier once per Lambda container
+    """
+    global _db, _scraper, _notifier
+    if _db is None:
+        # Build everything before caching, so a failed constructor is retried on the next call
+        db = DealDatabase(bucket=bucket_name, key='deals.json')
+        scraper = BuyingGroupScraper()
+        notifier = DiscordNotifier(discord_webhook) if discord_webhook else None
+        _db, _scraper, _notifier = db, scraper, notifier
+    return _db, _scraper, _notifier
+
 def lambda_handler(event, context):
     """
     Lambda function to monitor buying group deals
@@ -22,10 +41,8 @@ def lambda_handler(event, context):
         if not all([bucket_name, username, password]):
             raise ValueError("Missing required environment variables")
         
-        # Initialize components
-        db = DealDatabase(bucket=bucket_name, key='deals.json')
-        scraper = BuyingGroupScraper()
-        notifier = DiscordNotifier(discord_webhook) if discord_webhook else None
+        # Initialize components (reused across warm invocations)
+        db, scraper, notifier = get_components(bucket_name, discord_webhook)
         
         # Check for new deals
         new_deals = check_for_new_deals(scraper, db)
@@ -69,15 +86,18 @@ def check_for_new_deals(scraper, db):
         # Get current deals from website
         current_deals = scraper.get_deals()
         
-        # Get existing deals from database
-        existing_deals = db.get_all_deals()
+        # Get existing deal IDs from database
+        existing_ids = db.get_deal_ids()
         
         # Find new deals
         new_deals = []
         for deal in current_deals:
-            if not db.deal_exists(deal['deal_id']):
+            if deal['deal_id'] not in existing_ids:
+                existing_ids.add(deal['deal_id'])
                 new_deals.append(deal)
-                db.add_deal(deal)
+        
+        # Save all new deals in one S3 write
+        db.add_deals(new_deals)
         
         return new_deals
         
@@ -34,9 +34,9 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             self.send_header('Content-type', 'application/json')
             self.end_headers()
             
-            # Get monitor status if available
+            # Get monitor status from the running instance if available
             try:
-                monitor = BuyingGroupMonitor()
+                monitor = self.server.monitor or BuyingGroupMonitor()
                 status = monitor.get_status()
                 response = status
             except Exception as e:
@@ -50,9 +50,10 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             self.send_response(404)
             self.end_headers()
 
-def start_health_server(port=8000):
+def start_health_server(port=8000, monitor=None):
     """Start a simple HTTP server for health checks."""
     server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
+    server.monitor = monitor
     server_thread = threading.Thread(target=server.serve_forever, daemon=True)
     server_thread.start()
     print(f"Health check server started on port {port}")
@@ -81,7 +82,7 @@ def main():
             print(f"  Health: {status['health']}")
             print(f"  Config: {status['config']}")
         except Exception as e:
-            logger.error(f"Error getting status: {e}", exc_info=True)
+            logger.error("Error getting status: %s", e, exc_info=True)
             sys.exit(1)
     
     elif args.command == 'start':
@@ -92,7 +93,7 @@ def main():
             monitor = BuyingGroupMonitor()
             
             # Start health check server
-            start_health_server(args.port)
+            start_health_server(args.port, monitor)
             
             # Start the monitor
             monitor.start()
@@ -103,7 +104,7 @@ def main():
                 monitor.stop()
             sys.exit(0)
         except Exception as e:
-            logger.error(f"Error starting monitor: {e}", exc_info=True)
+            logger.error("Error starting monitor: %s", e, exc_info=True)
             sys.exit(1)
 
 if __name__ == '__main__':
@@ -44,7 +44,7 @@ class BuyingGroupMonitor:
                 self.logger.info("Received interrupt signal")
                 break
             except Exception as e:
-                self.logger.error(f"Error in monitoring loop: {e}", exc_info=True)
+                self.logger.error("Error in monitoring loop: %s", e, exc_info=True)
                 time.sleep(60)  # Wait 1 minute before retrying
         
         self.logger.info("Buying Group Monitor stopped")
@@ -62,22 +62,24 @@ class BuyingGroupMonitor:
             # Get current deals from website
             current_deals = self.scraper.get_deals()
             
-            # Find new deals
+            # Find new deals against the stored IDs, loaded once per check
+            existing_ids = self.db.get_deal_ids()
             new_deals = []
             for deal in current_deals:
-                if not self.db.deal_exists(deal['deal_id']):
+                if deal['deal_id'] not in existing_ids:
+                    existing_ids.add(deal['deal_id'])
                     new_deals.append(deal)
-                    self.db.add_deal(deal)
             
             if new_deals:
-                self.logger.info(f"Found {len(new_deals)} new deals")
+                self.db.add_deals(new_deals)
+                self.logger.info("Found %d new deals", len(new_deals))
                 if self.notifier:
                     self.notifier.send_new_deals_notification(new_deals)
             else:
                 self.logger.info("No new deals found")
                 
         except Exception as e:
-            self.logger.error(f"Error checking for new deals: {e}", exc_info=True)
+            self.logger.error("Error checking for new deals: %s", e, exc_info=True)
             if self.notifier:
                 self.notifier.send_error_notification(str(e))
     
@@ -1,21 +1,108 @@
 import requests
+import logging
 from typing import List, Dict, Optional
 from config import DISCORD_WEBHOOK_URL, REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY
 import time
 
+NEW_DEAL_VALUE_TEMPLATE = (
+    "**Store:** {store}\n"
+    "**Price:** ${price:.2f}\n"
+    "**Max Quantity:** {max_quantity}\n"
+    "**Delivery:** {delivery_date}\n"
+    "**Link:** [Click Here]({link})"
+)
+
+SUMMARY_VALUE_TEMPLATE = (
+    "**Store:** {store}\n"
+    "**Price:** ${price:.2f}\n"
+    "**Max Quantity:** {max_quantity}\n"
+    "**Committed:** {current_quantity}\n"
+    "**Delivery:** {delivery_date}\n"
+    "**Link:** [Product Link]({link})"
+)
+
+REQUIRED_DEAL_FIELDS = ('title', 'store', 'price', 'max_quantity')
+
+# Discord webhook limits
+MAX_FIELDS_PER_EMBED = 25
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_MESSAGE_CHARS = 6000
+
+def _embed_length(embed: Dict) -> int:
+    """Count the characters Discord includes in its per-message embed limit."""
+    length = len(embed.get("title", "")) + len(embed.get("description", ""))
+    length += len(embed.get("footer", {}).get("text", ""))
+    for field in embed.get("fields", []):
+        length += len(field["name"]) + len(field["value"])
+    return length
+
+def _batch_embeds(embed: Dict) -> List[List[Dict]]:
+    """Split an embed's fields across embeds and pack them into as few messages as Discord allows."""
+    fields = embed.get("fields", [])
+    if not fields:
+        return [[embed]]
+    
+    # Each part repeats the title, description and footer, so they count against every part
+    base_chars = _embed_length({**embed, "fields": []})
+    embeds = []
+    part, part_chars = [], base_chars
+    for field in fields:
+        field_chars = len(field["name"]) + len(field["value"])
+        if part and (len(part) >= MAX_FIELDS_PER_EMBED or part_chars + field_chars > MAX_MESSAGE_CHARS):
+            embeds.append({**embed, "fields": part})
+            part, part_chars = [], base_chars
+        part.append(field)
+        part_chars += field_chars
+    embeds.append({**embed, "fields": part})
+    
+    messages = [[]]
+    message_chars = 0
+    for part in embeds:
+        part_chars = _embed_length(part)
+        current = messages[-1]
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or message_chars + part_chars > MAX_MESSAGE_CHARS):
+            current = []
+            messages.append(current)
+            message_chars = 0
+        current.append(part)
+        message_chars += part_chars
+    return messages
+
 class DiscordNotifier:
     def __init__(self, webhook_url: str = DISCORD_WEBHOOK_URL or ""):
         self.webhook_url = webhook_url
+        self.logger = logging.getLogger('discord_notifier')
+        # One session per notifier so webhook posts reuse the same connection
+        self.session = requests.Session()
     
     def _make_request_with_retry(self, url: str, json_data: dict) -> Optional[requests.Response]:
         """Make HTTP request with retry logic and proper error handling."""
-        from utils import make_request_with_retry
-        return make_request_with_retry('POST', url, None, json=json_data)
+        from utils import make_request_with_retry, dumps_json
+        return make_request_with_retry(
+            'POST', url, None,
+            session=self.session,
+            data=dumps_json(json_data),
+            headers={'Content-Type': 'application/json'}
+        )
+    
+    def _send_embed(self, embed: Dict, kind: str) -> bool:
+        """Post an embed to the webhook, batched to fit Discord's limits, and log the outcome."""
+        try:
+            for embeds in _batch_embeds(embed):
+                response = self._make_request_with_retry(self.webhook_url, {"embeds": embeds})
+                if not response:
+                    self.logger.error("Failed to send %s notification after all retries", kind)
+                    return False
+        except Exception as e:
+            self.logger.error("Error sending %s notification: %s", kind, e, exc_info=True)
+            return False
+        
+        self.logger.info("Successfully sent %s notification", kind)
+        return True
     
     def _validate_deal_data(self, deal: Dict) -> bool:
         """Validate deal data before sending to Discord."""
-        required_fields = ['title', 'store', 'price', 'max_quantity']
-        for field in required_fields:
+        for field in REQUIRED_DEAL_FIELDS:
             if field not in deal or deal[field] is None:
                 print(f"Deal missing required field: {field}")
                 return False
@@ -23,22 +110,23 @@ class DiscordNotifier:
     
     def _sanitize_deal_data(self, deal: Dict) -> Dict:
         """Sanitize deal data for Discord embed."""
-        sanitized = deal.copy()
-        
         # Ensure link is valid
         link = deal.get('link', '')
         if not link or not link.startswith(('http://', 'https://')):
             link = "No link available"
-        sanitized['link'] = link
-        
-        # Ensure delivery_date is not None
-        sanitized['delivery_date'] = deal.get('delivery_date', 'N/A')
         
         # Truncate title if too long
-        if len(sanitized['title']) > 100:
-            sanitized['title'] = sanitized['title'][:97] + "..."
+        title = deal['title']
+        if len(title) > 100:
+            title = title[:97] + "..."
         
-        return sanitized
+        # Build the sanitized copy in one step; delivery_date defaults when missing
+        return {
+            **deal,
+            'title': title,
+            'link': link,
+            'delivery_date': deal.get('delivery_date', 'N/A')
+        }
     
     def send_new_deals_notification(self, deals: List[Dict]) -> bool:
         """Send notification about new deals."""
@@ -51,7 +139,7 @@ class DiscordNotifier:
             return True
         
         try:
-            # Validate and sanitize all deals
+            # Validate and sanitize all deals in a single pass
             valid_deals = []
             for deal in deals:
                 if self._validate_deal_data(deal):
@@ -76,33 +164,18 @@ class DiscordNotifier:
             }
             
             # Add each deal as a field
+            format_value = NEW_DEAL_VALUE_TEMPLATE.format
             for deal in valid_deals:
                 field = {
                     "name": f"💰 {deal['title']}",
-                    "value": f"**Store:** {deal['store']}\n"
-                            f"**Price:** ${deal['price']:.2f}\n"
-                            f"**Max Quantity:** {deal['max_quantity']}\n"
-                            f"**Delivery:** {deal['delivery_date']}\n"
-                            f"**Link:** [Click Here]({deal['link']})",
+                    "value": format_value(**deal),
                     "inline": False
                 }
                 embed["fields"].append(field)
             
-            # Send to Discord
-            payload = {
-                "embeds": [embed]
-            }
-            
-            response = self._make_request_with_retry(self.webhook_url, payload)
-            if response:
-                print(f"Successfully sent notification for {len(valid_deals)} new deals")
-                return True
-            else:
-                print("Failed to send Discord notification after all retries")
-                return False
-            
+            return self._send_embed(embed, f"new deals ({len(valid_deals)})")
         except Exception as e:
-            print(f"Error sending Discord notification: {e}")
+            self.logger.error("Error sending Discord notification: %s", e, exc_info=True)
             return False
     
     def send_deal_update_notification(self, deal: Dict, old_quantity: int, new_quantity: int) -> bool:
@@ -154,20 +227,9 @@ class DiscordNotifier:
                 }
             }
             
-            payload = {
-                "embeds": [embed]
-            }
-            
-            response = self._make_request_with_retry(self.webhook_url, payload)
-            if response:
-                print(f"Successfully sent quantity update notification for {sanitized_deal['title']}")
-                return True
-            else:
-                print("Failed to send quantity update notification after all retries")
-                return False
-            
+            return self._send_embed(embed, "quantity update")
         except Exception as e:
-            print(f"Error sending quantity update notification: {e}")
+            self.logger.error("Error sending quantity update notification: %s", e, exc_info=True)
             return False
     
     def send_error_notification(self, error_message: str) -> bool:
@@ -190,20 +252,9 @@ class DiscordNotifier:
                 }
             }
             
-            payload = {
-                "embeds": [embed]
-            }
-            
-            response = self._make_request_with_retry(self.webhook_url, payload)
-            if response:
-                self.logger.info("Successfully sent error notification")
-                return True
-            else:
-                self.logger.error("Failed to send error notification after all retries")
-                return False
-            
+            return self._send_embed(embed, "error")
         except Exception as e:
-            self.logger.error(f"Error sending error notification: {e}", exc_info=True)
+            self.logger.error("Error sending error notification: %s", e, exc_info=True)
             return False
     
     def send_startup_notification(self) -> bool:
@@ -222,20 +273,9 @@ class DiscordNotifier:
                 }
             }
             
-            payload = {
-                "embeds": [embed]
-            }
-            
-            response = self._make_request_with_retry(self.webhook_url, payload)
-            if response:
-                self.logger.info("Successfully sent startup notification")
-                return True
-            else:
-                self.logger.error("Failed to send startup notification after all retries")
-                return False
-            
+            return self._send_embed(embed, "startup")
         except Exception as e:
-            self.logger.error(f"Error sending startup notification: {e}", exc_info=True)
+            self.logger.error("Error sending startup notification: %s", e, exc_info=True)
             return False
     
     def send_all_deals_summary(self, deals: List[Dict]) -> bool:
@@ -254,27 +294,24 @@ class DiscordNotifier:
                 "fields": [],
                 "footer": {"text": "Buying Group Monitor"}
             }
+            format_value = SUMMARY_VALUE_TEMPLATE.format
             for deal in deals:
                 field = {
                     "name": f"{deal['title'][:100]}",
-                    "value": (
-                        f"**Store:** {deal['store']}\n"
-                        f"**Price:** ${deal['price']:.2f}\n"
-                        f"**Max Quantity:** {deal['max_quantity']}\n"
-                        f"**Committed:** {deal.get('current_quantity', 0)}\n"
-                        f"**Delivery:** {deal.get('delivery_date', 'N/A')}\n"
-                        f"**Link:** [Product Link]({deal.get('link', '')})"
+                    "value": format_value(
+                        store=deal['store'],
+                        price=deal['price'],
+                        max_quantity=deal['max_quantity'],
+                        current_quantity=deal.get('current_quantity', 0),
+                        delivery_date=deal.get('delivery_date', 'N/A'),
+                        link=deal.get('link', '')
                     ),
                     "inline": False
                 }
                 embed["fields"].append(field)
-            payload = {"embeds": [embed]}
-            response = requests.post(self.webhook_url, json=payload)
-            response.raise_for_status()
-            print(f"Successfully sent all deals summary to Discord.")
-            return True
+            return self._send_embed(embed, "all deals summary")
         except Exception as e:
-            print(f"Error sending all deals summary: {e}")
+            self.logger.error("Error sending all deals summary: %s", e, exc_info=True)
             return False
     
     def send_warning_notification(self, warning_message: str) -> bool:
@@ -294,14 +331,7 @@ class DiscordNotifier:
                     "text": "Buying Group Monitor"
                 }
             }
-            payload = {"embeds": [embed]}
-            response = self._make_request_with_retry(self.webhook_url, payload)
-            if response:
-                self.logger.info("Successfully sent warning notification")
-                return True
-            else:
-                self.logger.error("Failed to send warning notification after all retries")
-                return False
+            return self._send_embed(embed, "warning")
         except Exception as e:
-            self.logger.error(f"Error sending warning notification: {e}", exc_info=True)
-            return False 
\ No newline at end of file
+            self.logger.error("Error sending warning notification: %s", e, exc_info=True)
+            return False
\ No newline at end of file
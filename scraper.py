@@ -1,8 +1,10 @@
 import requests
 import re
-import time
 import os
-from bs4 import BeautifulSoup
+import json
+import time
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
 from typing import List, Dict, Optional
 from config import (
     BUYING_GROUP_LOGIN_URL, 
@@ -12,11 +14,15 @@ from config import (
     DEFAULT_HEADERS,
     REQUEST_TIMEOUT,
     MAX_RETRIES,
-    RETRY_DELAY
+    RETRY_DELAY,
+    POOL_CONNECTIONS,
+    POOL_MAXSIZE,
+    SESSION_CACHE_PATH,
+    SESSION_CACHE_MAX_AGE_HOURS,
+    DEBUG
 )
 import hashlib
-import traceback
-from notifier import DiscordNotifier
+from urllib.parse import urljoin
 
 # Import urllib3 for retry strategy
 try:
@@ -27,45 +33,156 @@ except ImportError:
     Retry = None
     HTTPAdapter = None
 
+# lxml's C parser is much faster than the pure-Python html.parser; fall back if it is missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Deal cards on the dashboard; only these subtrees are parsed
+DEAL_CARD_CLASS = 'group relative flex flex-col overflow-hidden rounded-lg border border-gray-200 bg-white'
+DEAL_CARD_CLASSES = frozenset(DEAL_CARD_CLASS.split())
+
+def _is_deal_card_class(value) -> bool:
+    """Match the card classes as tokens, since the strainer sees the raw attribute during parsing."""
+    return bool(value) and DEAL_CARD_CLASSES.issubset(value.split())
+
+DEAL_CARD_STRAINER = SoupStrainer('div', class_=_is_deal_card_class)
+# A class attribute holding every card class token, in any order and spacing; checked on the
+# raw bytes so pages without cards skip the parse
+DEAL_CARD_MARKER_RE = re.compile((r'class\s*=\s*["\']' + ''.join(
+    rf'(?=[^"\']*(?<![\w-]){re.escape(token)}(?![\w-]))' for token in sorted(DEAL_CARD_CLASSES)
+)).encode())
+DEAL_CARD_SELECTOR = soupsieve.compile('div.' + '.'.join(DEAL_CARD_CLASS.split()))
+
+# Classes of the fields inside each deal card
+TITLE_CLASS = 'text-sm font-medium text-gray-900'
+STORE_CLASS = 'text-sm italic'
+PRICE_CLASS = 'text-base font-medium text-gray-900'
+COMMITTED_CLASS = 'leading-8'
+
+# The login page is only searched for CSRF inputs and meta tags
+LOGIN_FORM_STRAINER = SoupStrainer(['input', 'meta'])
+
+# Other input names the login form may use for its CSRF token
+FALLBACK_CSRF_INPUT_NAMES = ['csrf_token', 'csrf', 'token', '_csrf_token']
+
+# Elements whose class mentions error/alert/danger on a failed login page
+LOGIN_ERROR_SELECTOR = soupsieve.compile('[class*="error"], [class*="alert"], [class*="danger"]')
+
+# Patterns used when extracting fields from each deal card
+PRICE_RE = re.compile(r'\$?([\d,]+\.?\d*)')
+QUANTITY_RE = re.compile(r'(\d+)')
+DELIVERY_RE = re.compile(r'Deliver by ([^(]+)')
+
+# Extra headers for the login POST; requests merges them over the session defaults
+LOGIN_POST_HEADERS = {'Referer': BUYING_GROUP_LOGIN_URL}
+
+# Text shown on a deal card once the user has committed to it
+COMMITTED_PREFIX = "You have committed to purchase"
+
+def parse_html(response: requests.Response, **kwargs) -> BeautifulSoup:
+    """Parse a response from its raw bytes, skipping the decode to str done by response.text."""
+    # Only pass an encoding the server declared; otherwise let the parser sniff the document
+    content_type = response.headers.get('Content-Type', '').lower()
+    encoding = response.encoding if 'charset=' in content_type else None
+    return BeautifulSoup(response.content, HTML_PARSER, from_encoding=encoding, **kwargs)
+
 class BuyingGroupScraper:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update(DEFAULT_HEADERS)
         self.is_authenticated = False
         
-        # Configure retry strategy
+        # Validators from the last dashboard response, used for conditional GETs
+        self._etag = None
+        self._last_modified = None
+        self._last_deals = []
+        # Dashboard page returned by the last login redirect, not yet parsed
+        self._login_landing = None
+        
+        # Configure retry strategy and a keep-alive connection pool
         if Retry and HTTPAdapter:
-            retry_strategy = HTTPAdapter(
+            adapter = HTTPAdapter(
                 max_retries=Retry(
                     total=MAX_RETRIES,
                     backoff_factor=RETRY_DELAY,
-                    status_forcelist=[429, 500, 502, 503, 504]
-                )
+                    backoff_jitter=RETRY_DELAY / 2,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+                    respect_retry_after_header=True
+                ),
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                pool_block=False
             )
-            self.session.mount("http://", retry_strategy)
-            self.session.mount("https://", retry_strategy)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
     
-    def _make_request_with_retry(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
-        """Make HTTP request with retry logic and proper error handling using the same session."""
-        for attempt in range(MAX_RETRIES + 1):
-            try:
-                kwargs.setdefault('timeout', REQUEST_TIMEOUT)
-                response = getattr(self.session, method.lower())(url, **kwargs)
+    def _make_request_with_retry(self, method: str, url: str, allow_client_errors: bool = False, **kwargs) -> Optional[requests.Response]:
+        """Make HTTP request using the same session; retries and backoff are handled by the mounted Retry.
+        
+        With allow_client_errors, 4xx responses are returned to the caller instead of treated as failures.
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        try:
+            response = self.session.request(method.upper(), url, **kwargs)
+            if not (allow_client_errors and 400 <= response.status_code < 500):
                 response.raise_for_status()
-                return response
-            except requests.exceptions.RequestException as e:
-                print(f"Request attempt {attempt + 1} failed: {e}")
-                if attempt < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * (2 ** attempt))  # Exponential backoff
-                else:
-                    print(f"All {MAX_RETRIES + 1} request attempts failed")
-                    return None
-        return None
+        except requests.exceptions.RequestException as e:
+            print(f"Request to {url} failed after retries: {e}")
+            return None
+        
+        return response
+    
+    def _restore_session(self) -> bool:
+        """Load login cookies saved by a previous run and keep them if the session is still valid."""
+        if not SESSION_CACHE_PATH:
+            return False
+        try:
+            if time.time() - os.path.getmtime(SESSION_CACHE_PATH) > SESSION_CACHE_MAX_AGE_HOURS * 3600:
+                return False
+            with open(SESSION_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+            for cookie in cookies:
+                self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        except FileNotFoundError:
+            # Nothing saved yet, e.g. on the first run
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not load cached session: {e}")
+            return False
+        
+        if self.check_authentication():
+            self.is_authenticated = True
+            print("Restored session from cached cookies")
+            return True
+        self.session.cookies.clear()
+        return False
+    
+    def _save_session(self):
+        """Write the session cookies to SESSION_CACHE_PATH, readable only by the current user."""
+        if not SESSION_CACHE_PATH:
+            return
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path}
+            for c in self.session.cookies
+        ]
+        try:
+            fd = os.open(SESSION_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # The mode above only applies to new files; tighten an existing one before writing
+                if hasattr(os, 'fchmod'):
+                    os.fchmod(f.fileno(), 0o600)
+                json.dump(cookies, f)
+        except OSError as e:
+            print(f"Could not save session cookies: {e}")
     
     def login(self) -> bool:
         """Login to the buying group website."""
         try:
-            if os.getenv('DEBUG', 'false').lower() == 'true':
+            if DEBUG:
                 print(f"Attempting to login with username: {USERNAME}")
                 print(f"Using password: {'*' * len(PASSWORD) if PASSWORD else '(empty)'}")
             
@@ -77,22 +194,24 @@ class BuyingGroupScraper:
                 print("Failed to get login page")
                 return False
             
-            if os.getenv('DEBUG', 'false').lower() == 'true':
+            if DEBUG:
                 print(f"Login page status: {login_response.status_code}")
                 print(f"Login page URL: {login_response.url}")
             
-            soup = BeautifulSoup(login_response.text, 'html.parser')
+            soup = parse_html(login_response, parse_only=LOGIN_FORM_STRAINER)
             
             # Extract CSRF token
             csrf_token = None
             
             # Try multiple ways to find the CSRF token
             csrf_input = soup.find('input', {'name': '_token'})
-            print(f"CSRF input found: {csrf_input is not None}")
+            if DEBUG:
+                print(f"CSRF input found: {csrf_input is not None}")
             
             if csrf_input and hasattr(csrf_input, 'get') and not isinstance(csrf_input, str):
                 csrf_token = csrf_input.get('value')
-                print(f"CSRF token value: {csrf_token[:20] if csrf_token else 'None'}...")
+                if DEBUG:
+                    print(f"CSRF token value: {csrf_token[:20] if csrf_token else 'None'}...")
                 if not csrf_token:
                     print("CSRF input found but no value attribute")
             
@@ -101,25 +220,25 @@ class BuyingGroupScraper:
                 meta_csrf = soup.find('meta', {'name': 'csrf-token'})
                 if meta_csrf and hasattr(meta_csrf, 'get') and not isinstance(meta_csrf, str):
                     csrf_token = meta_csrf.get('content')
-                    print(f"Found CSRF token in meta tag: {csrf_token[:20] if csrf_token else 'None'}...")
+                    if DEBUG:
+                        print(f"Found CSRF token in meta tag: {csrf_token[:20] if csrf_token else 'None'}...")
             
-            # If still not found, try other common names
+            # If still not found, try other common names in a single pass over the inputs
             if not csrf_token:
-                for token_name in ['csrf_token', 'csrf', 'token', '_csrf_token']:
-                    token_input = soup.find('input', {'name': token_name})
-                    if token_input and hasattr(token_input, 'get') and not isinstance(token_input, str):
-                        csrf_token = token_input.get('value')
-                        print(f"Found CSRF token with name '{token_name}': {csrf_token[:20] if csrf_token else 'None'}...")
-                        break
+                token_input = soup.find('input', {'name': FALLBACK_CSRF_INPUT_NAMES})
+                if token_input:
+                    csrf_token = token_input.get('value')
+                    if DEBUG:
+                        print(f"Found CSRF token with name '{token_input.get('name')}': {csrf_token[:20] if csrf_token else 'None'}...")
             
             if not csrf_token:
                 print("Could not find CSRF token")
                 # Let's look for other possible token fields
-                all_inputs = [inp for inp in soup.find_all('input') if hasattr(inp, 'get') and not isinstance(inp, str)]
-                print(f"Found {len(all_inputs)} input fields:")
-                for inp in all_inputs:
-                    name = inp.get('name', 'no-name')
-                    print(f"  - {name}")
+                if DEBUG:
+                    input_names = [inp.get('name', 'no-name') for inp in soup.select('input')]
+                    print(f"Found {len(input_names)} input fields:")
+                    for name in input_names:
+                        print(f"  - {name}")
                 return False
             
             # Prepare login data
@@ -130,96 +249,133 @@ class BuyingGroupScraper:
                 'remember': 'on'
             }
             
-            print(f"Login data keys: {list(login_data.keys())}")
-            print(f"CSRF token length: {len(csrf_token) if csrf_token else 0}")
-            print(f"Username: {USERNAME}")
-            print(f"Password length: {len(PASSWORD) if PASSWORD else 0}")
+            if DEBUG:
+                print(f"Login data keys: {list(login_data.keys())}")
+                print(f"CSRF token length: {len(csrf_token) if csrf_token else 0}")
+                print(f"Username: {USERNAME}")
+                print(f"Password length: {len(PASSWORD) if PASSWORD else 0}")
             
             print("Submitting login form...")
-            # Add Referer header to mimic browser behavior
-            headers = dict(self.session.headers)
-            headers['Referer'] = BUYING_GROUP_LOGIN_URL
-            print(f"Headers: {list(headers.keys())}")
-            
             # Perform login as application/x-www-form-urlencoded
             login_response = self._make_request_with_retry(
                 'POST',
                 BUYING_GROUP_LOGIN_URL,
                 data=login_data,
-                headers=headers,
-                allow_redirects=True
+                # Add Referer header to mimic browser behavior
+                headers=LOGIN_POST_HEADERS,
+                allow_redirects=True,
+                # Let 4xx responses such as 419 (CSRF mismatch) through for the diagnostics below
+                allow_client_errors=True
             )
             
-            if not login_response:
+            # A 4xx response is falsy, so compare with None
+            if login_response is None:
                 print("Failed to submit login form")
                 return False
             
             print(f"Login response status: {login_response.status_code}")
             print(f"Login response URL: {login_response.url}")
-            print(f"Response headers: {dict(login_response.headers)}")
+            if DEBUG:
+                print(f"Response headers: {dict(login_response.headers)}")
             
             # If we get a 419 error, let's see the response content
             if login_response.status_code == 419:
                 print("Got 419 error - checking response content:")
-                print(f"Response text (first 500 chars): {login_response.text[:500]}")
+                print(f"Response text (first 500 bytes): {login_response.content[:500].decode('utf-8', 'replace')}")
                 return False
             
-            # Check if login was successful
-            if login_response.status_code == 200:
-                # Check if we're redirected to dashboard or still on login page
-                if 'dashboard' in login_response.url.lower() or 'login' not in login_response.url.lower():
-                    self.is_authenticated = True
-                    print("Successfully logged in to buying group")
-                    return True
-                else:
-                    print("Login failed - still on login page")
-                    # Let's check if there are any error messages
-                    soup = BeautifulSoup(login_response.text, 'html.parser')
-                    error_messages = soup.find_all(class_=re.compile(r'error|alert|danger'))
-                    if error_messages:
-                        print("Error messages found:")
-                        for error in error_messages:
-                            print(f"  - {error.get_text(strip=True)}")
-                    if os.getenv('DEBUG', 'false').lower() == 'true':
-                        print("--- Login Page HTML Start ---")
-                        print(login_response.text)
-                        print("--- Login Page HTML End ---")
-                    return False
-            else:
+            if login_response.status_code != 200:
                 print(f"Login failed with status code: {login_response.status_code}")
                 return False
-                
+            
+            # Check if we're redirected to dashboard or still on login page
+            landing_url = login_response.url.lower()
+            if 'dashboard' in landing_url or 'login' not in landing_url:
+                self.is_authenticated = True
+                self._save_session()
+                # The login redirect usually lands on the dashboard; keep it for the next get_deals
+                if login_response.url.rstrip('/') == BUYING_GROUP_DASHBOARD_URL.rstrip('/'):
+                    self._login_landing = login_response
+                print("Successfully logged in to buying group")
+                return True
+            
+            print("Login failed - still on login page")
+            # Let's check if there are any error messages
+            soup = parse_html(login_response)
+            error_messages = LOGIN_ERROR_SELECTOR.select(soup)
+            if error_messages:
+                print("Error messages found:")
+                for error in error_messages:
+                    print(f"  - {error.get_text(strip=True)}")
+            if DEBUG:
+                print("--- Login Page HTML Start ---")
+                print(login_response.text)
+                print("--- Login Page HTML End ---")
+            return False
+            
         except Exception as e:
             print(f"Error during login: {e}")
             return False
     
+    def _fetch_dashboard(self, headers: Optional[Dict] = None) -> Optional[requests.Response]:
+        """GET the dashboard, reusing the page the last login landed on if it has not been used yet."""
+        response, self._login_landing = self._login_landing, None
+        if response is not None:
+            return response
+        return self._make_request_with_retry('GET', BUYING_GROUP_DASHBOARD_URL, headers=headers or {})
+    
     def get_deals(self) -> List[Dict]:
         """Scrape deals from the dashboard page."""
         if not self.is_authenticated:
-            if not self.login():
+            if not self._restore_session() and not self.login():
                 return []
         
         try:
-            # Get the dashboard page
-            response = self._make_request_with_retry('GET', BUYING_GROUP_DASHBOARD_URL)
+            # Get the dashboard page, revalidating against the last response we parsed
+            conditional_headers = {}
+            if self._etag:
+                conditional_headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                conditional_headers['If-Modified-Since'] = self._last_modified
+            
+            response = self._fetch_dashboard(conditional_headers)
             
             if not response:
                 print("Failed to get dashboard page")
                 return []
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all deal cards
-            deal_cards = soup.find_all('div', class_='group relative flex flex-col overflow-hidden rounded-lg border border-gray-200 bg-white')
+            if response.status_code == 304:
+                print(f"Dashboard not modified, reusing {len(self._last_deals)} deals")
+                return list(self._last_deals)
+            
+            if 'login' in response.url.lower():
+                # The session cookie expired and the dashboard redirected us to the login page
+                print("Session expired - logging in again")
+                self.is_authenticated = False
+                if not self.login():
+                    return []
+                response = self._fetch_dashboard()
+                if not response:
+                    print("Failed to get dashboard page")
+                    return []
             
             deals = []
-            for card in deal_cards:
-                deal = self._extract_deal_from_card(card)
-                if deal:
-                    deals.append(deal)
+            # Skip parsing entirely when the page has no deal cards at all
+            if DEAL_CARD_MARKER_RE.search(response.content):
+                soup = parse_html(response, parse_only=DEAL_CARD_STRAINER)
+                
+                # Walk the deal cards lazily rather than building a list of them first
+                for card in DEAL_CARD_SELECTOR.iselect(soup):
+                    deal = self._extract_deal_from_card(card)
+                    if deal:
+                        deals.append(deal)
+            
+            self._etag = response.headers.get('ETag')
+            self._last_modified = response.headers.get('Last-Modified')
+            self._last_deals = deals
             
             print(f"Found {len(deals)} deals on the dashboard")
-            return deals
+            return list(deals)
             
         except Exception as e:
             print(f"Error scraping deals: {e}")
@@ -229,26 +385,25 @@ class BuyingGroupScraper:
         """Extract deal information from a deal card."""
         try:
             # Extract title
-            title_elem = card.find('h3', class_='text-sm font-medium text-gray-900')
+            title_elem = card.find('h3', class_=TITLE_CLASS)
             title = title_elem.get_text(strip=True) if title_elem else "Unknown Title"
             
             # Extract store
-            store_elem = card.find('p', class_='text-sm italic')
+            store_elem = card.find('p', class_=STORE_CLASS)
             store = "Unknown Store"
             if store_elem:
-                store_text = store_elem.get_text(strip=True)
-                if "From:" in store_text:
-                    store = store_text.split("From:")[1].strip()
+                _, sep, store_text = store_elem.get_text(strip=True).partition("From:")
+                if sep:
+                    store = store_text.strip()
             
             # Extract price
-            price_elem = card.find('p', class_='text-base font-medium text-gray-900')
+            price_elem = card.find('p', class_=PRICE_CLASS)
             price = 0.0
             if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                if "Price:" in price_text:
-                    price_str = price_text.split("Price:")[1].strip()
+                _, sep, price_str = price_elem.get_text(strip=True).partition("Price:")
+                if sep:
                     # Extract numeric value from price string
-                    price_match = re.search(r'\$?([\d,]+\.?\d*)', price_str)
+                    price_match = PRICE_RE.search(price_str)
                     if price_match:
                         price = float(price_match.group(1).replace(',', ''))
             
@@ -266,23 +421,31 @@ class BuyingGroupScraper:
             
             # Extract current quantity (if already committed)
             current_quantity = 0
-            committed_text = card.find('span', class_='leading-8')
+            committed_text = card.find('span', class_=COMMITTED_CLASS)
             if committed_text:
-                text = committed_text.get_text(strip=True)
-                if "You have committed to purchase" in text:
-                    quantity_match = re.search(r'(\d+)', text)
-                    if quantity_match:
-                        current_quantity = int(quantity_match.group(1))
+                # A single text node can be read directly without walking the children
+                text = committed_text.string
+                text = text.strip() if text is not None else committed_text.get_text(strip=True)
+                if text.startswith(COMMITTED_PREFIX):
+                    # The quantity directly follows the prefix, so avoid the regex in the common case
+                    quantity_str = text[len(COMMITTED_PREFIX):].lstrip().split(" ", 1)[0]
+                    try:
+                        current_quantity = int(quantity_str)
+                    except ValueError:
+                        quantity_match = QUANTITY_RE.search(text)
+                        if quantity_match:
+                            current_quantity = int(quantity_match.group(1))
             
             # Extract delivery date from title
             delivery_date = ""
-            delivery_match = re.search(r'Deliver by ([^(]+)', title)
+            delivery_match = DELIVERY_RE.search(title)
             if delivery_match:
                 delivery_date = delivery_match.group(1).strip()
             
             # Generate unique deal ID from title and store
             # Use a more stable ID generation to avoid duplicates
-            deal_text = f"{store}_{title}".lower().strip()
+            # store and title are already stripped, so no further normalization is needed
+            deal_text = f"{store}_{title}".lower()
             deal_id = hashlib.md5(deal_text.encode()).hexdigest()[:16]
             
             # Validate required fields
@@ -294,9 +457,11 @@ class BuyingGroupScraper:
                 print("Deal card missing store information")
                 return None
             
-            # Sanitize link
-            if link and not link.startswith(('http://', 'https://')):
-                link = f"https://buyinggroup.ca{link}" if link.startswith('/') else ""
+            # Resolve relative links against the page they came from and drop non-HTTP ones
+            if link:
+                link = urljoin(BUYING_GROUP_DASHBOARD_URL, link)
+                if not link.startswith(('http://', 'https://')):
+                    link = ""
             
             return {
                 'deal_id': deal_id,
@@ -316,7 +481,10 @@ class BuyingGroupScraper:
     def check_authentication(self) -> bool:
         """Check if the session is still authenticated."""
         try:
-            response = self.session.get(BUYING_GROUP_DASHBOARD_URL)
+            # HEAD is enough to see whether we get redirected to the login page
+            response = self.session.head(BUYING_GROUP_DASHBOARD_URL, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 405:
+                response = self.session.get(BUYING_GROUP_DASHBOARD_URL, timeout=REQUEST_TIMEOUT)
             return response.status_code == 200 and 'login' not in response.url.lower()
-        except:
+        except requests.exceptions.RequestException:
             return False 
\ No newline at end of file
@@ -3,29 +3,68 @@
 Shared utilities for the buying group monitor
 """
 
+import json
+import random
 import time
 import requests
-from typing import Optional
-from config import REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY
+from typing import Any, Optional
+from config import (
+    REQUEST_TIMEOUT,
+    MAX_RETRIES,
+    RETRY_DELAY
+)
 
-def make_request_with_retry(method: str, url: str, logger=None, **kwargs) -> Optional[requests.Response]:
-    """Make HTTP request with retry logic and proper error handling."""
+# orjson is optional; fall back to the standard library when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+def loads_json(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _retry_delay(attempt: int, error: requests.exceptions.RequestException) -> float:
+    """Exponential backoff with jitter, stretched to honour a numeric Retry-After header."""
+    delay = RETRY_DELAY * (2 ** attempt) + random.uniform(0, RETRY_DELAY / 2)
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get('Retry-After', 0)))
+        except ValueError:
+            pass
+    return delay
+
+def make_request_with_retry(method: str, url: str, logger=None, session: Optional[requests.Session] = None, **kwargs) -> Optional[requests.Response]:
+    """Make HTTP request with retry logic and proper error handling.
+
+    Pass a long-lived session to reuse its keep-alive connections across calls.
+    """
+    session = session or requests.Session()
     for attempt in range(MAX_RETRIES + 1):
         try:
             kwargs.setdefault('timeout', REQUEST_TIMEOUT)
-            response = getattr(requests.Session(), method.lower())(url, **kwargs)
+            response = getattr(session, method.lower())(url, **kwargs)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
             if logger:
-                logger.warning(f"Request attempt {attempt + 1} failed: {e}")
+                logger.warning("Request attempt %d failed: %s", attempt + 1, e)
             else:
                 print(f"Request attempt {attempt + 1} failed: {e}")
             if attempt < MAX_RETRIES:
-                time.sleep(RETRY_DELAY * (2 ** attempt))  # Exponential backoff
+                time.sleep(_retry_delay(attempt, e))
             else:
                 if logger:
-                    logger.error(f"All {MAX_RETRIES + 1} request attempts failed")
+                    logger.error("All %d request attempts failed", MAX_RETRIES + 1)
                 else:
                     print(f"All {MAX_RETRIES + 1} request attempts failed")
                 return None